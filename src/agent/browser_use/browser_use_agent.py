@@ -4,6 +4,7 @@ import asyncio
 import logging
 import os
 import random
+from dataclasses import dataclass
 from typing import List
 
 # from lmnr.sdk.decorators import observe
@@ -19,76 +20,242 @@ from browser_use.agent.views import (
 )
 from browser_use.browser.views import BrowserStateHistory
 from browser_use.controller.registry.views import ActionModel
-from browser_use.utils import time_execution_async
+from browser_use.utils import SignalHandler, time_execution_async
 from dotenv import load_dotenv
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-SKIP_LLM_API_KEY_VERIFICATION = (
-    os.environ.get("SKIP_LLM_API_KEY_VERIFICATION", "false").lower()[0] in "ty1"
+# Leading characters accepted as "true" for boolean env vars (true/yes/1)
+_TRUE_PREFIXES = frozenset("ty1")
+
+
+def _parse_bool(value: str | None, default: bool = False) -> bool:
+    """Parse a boolean setting, treating values starting with t/y/1 as true."""
+    if not value:
+        return default
+    return value[:1].lower() in _TRUE_PREFIXES
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    """Read a boolean env var, see ``_parse_bool``."""
+    return _parse_bool(os.environ.get(name), default)
+
+
+SKIP_LLM_API_KEY_VERIFICATION = _env_bool("SKIP_LLM_API_KEY_VERIFICATION")
+
+# Tool calling method used in "auto" mode, keyed by chat model class name
+_LIBRARY_TOOL_CALLING_METHOD: dict[str, ToolCallingMethod | None] = {
+    "ChatGoogleGenerativeAI": None,
+    "ChatOpenAI": "function_calling",
+    "AzureChatOpenAI": "function_calling",
+}
+
+_UNSET = object()
+
+# Upper bound on a single pause wait, so direct writes to state.paused are seen
+_PAUSE_RECHECK_SECONDS = 0.5
+
+# Env vars are named <DELAY_TYPE>_<SETTING>, e.g. STEP_DELAY_MINUTES
+_DELAY_TYPES = ("STEP", "ACTION", "TASK")
+_DELAY_KEYS = frozenset(
+    {
+        "ENABLE_RANDOM_INTERVAL",
+        "DELAY_MINUTES",
+        "MIN_DELAY_MINUTES",
+        "MAX_DELAY_MINUTES",
+    }
 )
 
+# Actions that do not interact with the page and so are not delayed
+_NO_DELAY_ACTIONS = frozenset({"done", "wait"})
+
+
+def _action_needs_humanlike_delay(action: ActionModel) -> bool:
+    """Return False if the action is a terminal or no-op action like done/wait."""
+    return not _NO_DELAY_ACTIONS.issuperset(action.model_dump(exclude_unset=True))
+
+
+@dataclass(slots=True)
+class _DelaySpec:
+    """Parsed delay settings for one delay type (STEP, ACTION or TASK)."""
+
+    name: str
+    enabled: bool = False
+    random: bool = False
+    fixed_s: float = 0.0
+    min_s: float = 0.0
+    max_s: float = 0.0
+    span_s: float = 0.0
+
+
+class _ActionDelayController:
+    """Controller proxy that applies the agent's ACTION delay between actions."""
+
+    def __init__(self, controller, agent: BrowserUseAgent):
+        self._controller = controller
+        self._agent = agent
+        self._first_action = True
+
+    def __getattr__(self, name):
+        return getattr(self._controller, name)
+
+    async def act(self, action: ActionModel, *args, **kwargs) -> ActionResult:
+        # Execute the first action without delay
+        if self._first_action:
+            self._first_action = False
+        elif _action_needs_humanlike_delay(action):
+            await self._agent._apply_delay(self._agent._action_delay)
+            # The delay can be minutes long, so honour a stop/pause issued during it
+            await self._agent._raise_if_stopped_or_paused()
+        return await self._controller.act(action, *args, **kwargs)
+
 
 class BrowserUseAgent(Agent):
     def __init__(self, *args, **kwargs):
         """Initialize the agent with cached delay settings for better performance."""
         super().__init__(*args, **kwargs)
-        self._delay_settings_cache = {}
+        self._rng = random.Random()  # Per-agent generator for random delays
         self._cache_delay_settings()
 
+        # Pause/stop signalling so a paused run waits instead of polling
+        self._resume_event = asyncio.Event()
+        self._resume_event.set()
+        self._stop_event = asyncio.Event()
+
     def _cache_delay_settings(self):
-        """Cache delay settings from environment variables to avoid repeated file reads."""
-        delay_types = ["STEP", "ACTION", "TASK"]
+        """Cache delay settings from environment variables to avoid repeated file reads.
 
-        for delay_type in delay_types:
-            # Cache random interval settings
-            enable_random_str = os.environ.get(
-                f"{delay_type}_ENABLE_RANDOM_INTERVAL", "false"
-            )
-            enable_random = enable_random_str.lower() == "true"
+        Values are parsed to seconds once here so ``_apply_delay`` does no parsing.
+        """
+        # Collect all delay settings in a single pass over the environment
+        env_settings: dict[str, dict[str, str]] = {
+            delay_type: {} for delay_type in _DELAY_TYPES
+        }
+        for key, value in os.environ.items():
+            prefix, _, suffix = key.partition("_")
+            values = env_settings.get(prefix)
+            if values is None:
+                continue
+            if suffix in _DELAY_KEYS:
+                values[suffix] = value
+            elif "DELAY" in suffix:
+                logger.warning("Ignoring unrecognized delay setting: %s", key)
+
+        self._step_delay = self._load_delay_spec("STEP", env_settings["STEP"])
+        self._action_delay = self._load_delay_spec("ACTION", env_settings["ACTION"])
+        self._task_delay = self._load_delay_spec("TASK", env_settings["TASK"])
+
+        logger.debug(
+            "Cached delay settings: %r, %r, %r",
+            self._step_delay,
+            self._action_delay,
+            self._task_delay,
+        )
 
-            # Cache fixed delay settings
-            delay_minutes_str = os.environ.get(f"{delay_type}_DELAY_MINUTES", "0.0")
-            if not delay_minutes_str:
-                delay_minutes_str = "0.0"
+    @staticmethod
+    def _load_delay_spec(delay_type: str, values: dict[str, str]) -> _DelaySpec:
+        """Parse the environment settings collected for a single delay type."""
+        # Cache random interval settings
+        enable_random = _parse_bool(values.get("ENABLE_RANDOM_INTERVAL"))
 
-            # Cache random delay range settings
-            min_delay_str = os.environ.get(f"{delay_type}_MIN_DELAY_MINUTES", "0.0")
-            if not min_delay_str:
-                min_delay_str = "0.0"
+        # Cache fixed delay settings
+        delay_minutes_str = values.get("DELAY_MINUTES") or "0.0"
 
-            max_delay_str = os.environ.get(f"{delay_type}_MAX_DELAY_MINUTES", "0.0")
-            if not max_delay_str:
-                max_delay_str = "0.0"
+        # Cache random delay range settings
+        min_delay_str = values.get("MIN_DELAY_MINUTES") or "0.0"
+        max_delay_str = values.get("MAX_DELAY_MINUTES") or "0.0"
 
-            self._delay_settings_cache[delay_type] = {
-                "enable_random": enable_random,
-                "delay_minutes": delay_minutes_str,
-                "min_delay_minutes": min_delay_str,
-                "max_delay_minutes": max_delay_str,
-            }
+        spec = _DelaySpec(delay_type, random=enable_random)
+
+        if enable_random:
+            try:
+                min_seconds_raw = float(min_delay_str) * 60
+                max_seconds_raw = float(max_delay_str) * 60
+                spec.min_s = min(min_seconds_raw, max_seconds_raw)
+                spec.max_s = max(min_seconds_raw, max_seconds_raw)
+                spec.span_s = spec.max_s - spec.min_s
+            except ValueError:
+                logger.warning(
+                    f"Invalid values for {delay_type} random delay: "
+                    f"min='{min_delay_str}', max='{max_delay_str}'. Expected floats."
+                )
+            spec.enabled = spec.max_s > 0.0
+            if not spec.enabled:
+                logger.info(
+                    f"Random {delay_type.lower()} delay is enabled but min/max values result in no delay."
+                )
+        else:
+            try:
+                spec.fixed_s = float(delay_minutes_str) * 60
+            except ValueError:
+                logger.warning(
+                    f"Invalid value for {delay_type}_DELAY_MINUTES: '{delay_minutes_str}'. Expected a float."
+                )
+            spec.enabled = spec.fixed_s > 0.0
 
-        logger.debug(f"Cached delay settings: {self._delay_settings_cache}")
+        return spec
 
     def invalidate_delay_cache(self):
         """Invalidate and refresh the delay settings cache."""
         self._cache_delay_settings()
         logger.debug("Delay settings cache invalidated and refreshed")
 
+    def pause(self) -> None:
+        """Pause the agent before the next step."""
+        super().pause()
+        self._resume_event.clear()
+
+    def resume(self) -> None:
+        """Resume a paused agent."""
+        super().resume()
+        self._resume_event.set()
+
+    def stop(self) -> None:
+        """Stop the agent, waking it up if it is currently paused."""
+        super().stop()
+        self._stop_event.set()
+
+    async def _wait_while_paused(self) -> None:
+        """Block until resume() or stop() is called, or a short timeout passes.
+
+        resume() and stop() wake the wait immediately. The state flags may also
+        be written directly, so the events are synced from them before waiting
+        and the wait times out after ``_PAUSE_RECHECK_SECONDS``; callers loop on
+        ``state.paused`` to pick up such writes.
+        """
+        if self.state.paused:
+            self._resume_event.clear()
+        if not self.state.stopped:
+            self._stop_event.clear()
+
+        resume_waiter = asyncio.ensure_future(self._resume_event.wait())
+        stop_waiter = asyncio.ensure_future(self._stop_event.wait())
+        try:
+            await asyncio.wait(
+                {resume_waiter, stop_waiter},
+                timeout=_PAUSE_RECHECK_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            resume_waiter.cancel()
+            stop_waiter.cancel()
+
     def _set_tool_calling_method(self) -> ToolCallingMethod | None:
+        # The parent constructor calls this before our own __init__ body runs,
+        # so the cache is filled lazily on first use.
+        cached = getattr(self, "_cached_tool_calling_method", _UNSET)
+        if cached is _UNSET:
+            cached = self._compute_tool_calling_method()
+            self._cached_tool_calling_method = cached
+        return cached
+
+    def _compute_tool_calling_method(self) -> ToolCallingMethod | None:
         tool_calling_method = self.settings.tool_calling_method
         if tool_calling_method == "auto":
             if is_model_without_tool_support(self.model_name):
                 return "raw"
-            elif self.chat_model_library == "ChatGoogleGenerativeAI":
-                return None
-            elif self.chat_model_library == "ChatOpenAI":
-                return "function_calling"
-            elif self.chat_model_library == "AzureChatOpenAI":
-                return "function_calling"
-            else:
-                return None
+            return _LIBRARY_TOOL_CALLING_METHOD.get(self.chat_model_library)
         else:
             return tool_calling_method
 
@@ -108,95 +275,58 @@ class BrowserUseAgent(Agent):
         if not actions:
             return []
 
-        # Execute the first action without delay
-        results = await super().multi_act(
-            [actions[0]], check_for_new_elements=check_for_new_elements
-        )
-
-        # Execute remaining actions with delays between them
-        for action in actions[1:]:
-            # Apply ACTION delay between individual actions
-            await self._apply_delay("ACTION")
-
-            # Execute the next action
-            next_results = await super().multi_act(
-                [action], check_for_new_elements=check_for_new_elements
+        # With a single action or no ACTION delay there is nothing to
+        # interleave, so let the parent run the batch directly
+        if len(actions) == 1 or not self._action_delay.enabled:
+            return await super().multi_act(
+                actions, check_for_new_elements=check_for_new_elements
             )
 
-            # Combine results
-            results.extend(next_results)
-
-        return results
+        # The parent dispatches every action through self.controller.act, so
+        # swap in a proxy that delays before each action after the first and
+        # run the whole batch in one parent call. This keeps the parent's
+        # early exit on done/error/new elements, which per-action calls lost.
+        controller = self.controller
+        self.controller = _ActionDelayController(controller, self)
+        try:
+            return await super().multi_act(
+                actions, check_for_new_elements=check_for_new_elements
+            )
+        finally:
+            self.controller = controller
 
-    async def _apply_delay(self, delay_type: str) -> None:
+    async def _apply_delay(self, spec: _DelaySpec) -> None:
         """
-        Apply a delay based on the delay type (STEP, ACTION, or TASK).
-        Uses cached settings for better performance.
+        Apply a delay using cached, pre-parsed settings.
 
         Args:
-            delay_type: Type of delay to apply ("STEP", "ACTION", or "TASK")
+            spec: Delay settings for the delay type (STEP, ACTION, or TASK)
         """
-        # Get cached settings for this delay type
-        settings = self._delay_settings_cache.get(delay_type)
-        if not settings:
-            logger.warning(f"No cached settings found for delay type: {delay_type}")
+        if not spec.enabled:
             return
 
-        enable_random_delay = settings["enable_random"]
-
-        if enable_random_delay:
-            # Use cached random delay settings
-            min_delay_minutes_str = settings["min_delay_minutes"]
-            max_delay_minutes_str = settings["max_delay_minutes"]
-
-            try:
-                min_delay_minutes_raw = float(min_delay_minutes_str)
-                max_delay_minutes_raw = float(max_delay_minutes_str)
-
-                min_seconds_raw = min_delay_minutes_raw * 60
-                max_seconds_raw = max_delay_minutes_raw * 60
-
-                actual_min_seconds = min(min_seconds_raw, max_seconds_raw)
-                actual_max_seconds = max(min_seconds_raw, max_seconds_raw)
-
-                if actual_max_seconds > 0.0:
-                    random_delay_seconds = random.uniform(
-                        actual_min_seconds, actual_max_seconds
-                    )
-                    delay_minutes = random_delay_seconds / 60
-                    logger.info(
-                        f"Applying random {delay_type.lower()} delay between {actual_min_seconds / 60:.1f} and "
-                        f"{actual_max_seconds / 60:.1f} minutes. Chosen: {random_delay_seconds:.1f} seconds "
-                        f"({delay_minutes:.2f} minutes)."
-                    )
-                    await asyncio.sleep(random_delay_seconds)
-                else:
-                    logger.info(
-                        f"Random {delay_type.lower()} delay is enabled but min/max values result in no delay."
-                    )
-
-            except ValueError:
-                logger.warning(
-                    f"Invalid cached values for {delay_type} random delay: "
-                    f"min='{min_delay_minutes_str}', max='{max_delay_minutes_str}'. Expected floats."
+        if spec.random:
+            random_delay_seconds = spec.min_s + self._rng.random() * spec.span_s
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Applying random %s delay between %.1f and %.1f minutes. "
+                    "Chosen: %.1f seconds (%.2f minutes).",
+                    spec.name.lower(),
+                    spec.min_s / 60,
+                    spec.max_s / 60,
+                    random_delay_seconds,
+                    random_delay_seconds / 60,
                 )
+            await asyncio.sleep(random_delay_seconds)
         else:
-            # Use cached fixed delay settings
-            delay_minutes_str = settings["delay_minutes"]
-
-            try:
-                delay_minutes = float(delay_minutes_str)
-                if delay_minutes > 0.0:
-                    delay_seconds = delay_minutes * 60
-                    logger.info(
-                        f"Waiting for fixed {delay_type.lower()} delay of {delay_seconds:.1f} seconds "
-                        f"({delay_minutes:.2f} minutes)..."
-                    )
-                    await asyncio.sleep(delay_seconds)
-            except ValueError:
-                logger.warning(
-                    f"Invalid cached value for {delay_type}_DELAY_MINUTES: '{delay_minutes_str}'. Expected a float."
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Waiting for fixed %s delay of %.1f seconds (%.2f minutes)...",
+                    spec.name.lower(),
+                    spec.fixed_s,
+                    spec.fixed_s / 60,
                 )
+            await asyncio.sleep(spec.fixed_s)
 
     @time_execution_async("--run (agent)")
     async def run(
@@ -207,11 +337,13 @@ class BrowserUseAgent(Agent):
     ) -> AgentHistoryList:
         """Execute the task with maximum number of steps"""
 
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
 
-        # Set up the Ctrl+C signal handler with callbacks specific to this agent
-        from browser_use.utils import SignalHandler
+        # Local references avoid repeated attribute lookups in the step loop
+        state = self.state
+        settings = self.settings
 
+        # Set up the Ctrl+C signal handler with callbacks specific to this agent
         signal_handler = SignalHandler(
             loop=loop,
             pause_callback=self.pause,
@@ -229,41 +361,38 @@ class BrowserUseAgent(Agent):
                 result = await self.multi_act(
                     self.initial_actions, check_for_new_elements=False
                 )
-                self.state.last_result = result
+                state.last_result = result
+
+            # Process task delay once, before the first step
+            if self._task_delay.enabled:
+                await self._apply_delay(self._task_delay)
 
             for step in range(max_steps):
                 # Check if waiting for user input after Ctrl+C
-                if self.state.paused:
+                if state.paused:
                     signal_handler.wait_for_resume()
                     signal_handler.reset()
 
                 # Check if we should stop due to too many failures
-                if self.state.consecutive_failures >= self.settings.max_failures:
+                if state.consecutive_failures >= settings.max_failures:
                     logger.error(
-                        f"❌ Stopping due to {self.settings.max_failures} consecutive failures"
+                        f"❌ Stopping due to {settings.max_failures} consecutive failures"
                     )
                     break
 
-                # Check control flags before each step
-                if self.state.stopped:
+                # Check control flags before each step, allowing stop while paused
+                while state.paused and not state.stopped:
+                    await self._wait_while_paused()
+                if state.stopped:
                     logger.info("Agent stopped")
                     break
 
-                while self.state.paused:
-                    await asyncio.sleep(0.2)  # Small delay to prevent CPU spinning
-                    if self.state.stopped:  # Allow stopping while paused
-                        break
-
                 if on_step_start is not None:
                     await on_step_start(self)
 
                 # Process step delay
-                await self._apply_delay("STEP")
-
-                # Process task delay (if applicable for current task/run)
-                # Note: Task delay might not be applicable depending on implementation
-                if step == 0:  # Only apply task delay on first step
-                    await self._apply_delay("TASK")
+                if self._step_delay.enabled:
+                    await self._apply_delay(self._step_delay)
 
                 step_info = AgentStepInfo(step_number=step, max_steps=max_steps)
                 await self.step(step_info)
@@ -271,8 +400,8 @@ class BrowserUseAgent(Agent):
                 if on_step_end is not None:
                     await on_step_end(self)
 
-                if self.state.history.is_done():
-                    if self.settings.validate_output and step < max_steps - 1:
+                if state.history.is_done():
+                    if settings.validate_output and step < max_steps - 1:
                         if not await self._validate_output():
                             continue
 
@@ -281,7 +410,7 @@ class BrowserUseAgent(Agent):
             else:
                 error_message = "Failed to complete task in maximum steps"
 
-                self.state.history.history.append(
+                state.history.history.append(
                     AgentHistory(
                         model_output=None,
                         result=[
@@ -300,22 +429,22 @@ class BrowserUseAgent(Agent):
 
                 logger.info(f"❌ {error_message}")
 
-            return self.state.history
+            return state.history
 
         except KeyboardInterrupt:
             # Already handled by our signal handler, but catch any direct KeyboardInterrupt as well
             logger.info(
                 "Got KeyboardInterrupt during execution, returning current history"
             )
-            return self.state.history
+            return state.history
 
         finally:
             # Unregister signal handlers before cleanup
             signal_handler.unregister()
 
-            if self.settings.save_playwright_script_path:
+            if settings.save_playwright_script_path:
                 logger.info(
-                    f"Agent run finished. Attempting to save Playwright script to: {self.settings.save_playwright_script_path}"
+                    f"Agent run finished. Attempting to save Playwright script to: {settings.save_playwright_script_path}"
                 )
                 try:
                     # Extract sensitive data keys if sensitive_data is provided
@@ -325,8 +454,8 @@ class BrowserUseAgent(Agent):
                         else None
                     )
                     # Pass browser and context config to the saving method
-                    self.state.history.save_as_playwright_script(
-                        self.settings.save_playwright_script_path,
+                    state.history.save_as_playwright_script(
+                        settings.save_playwright_script_path,
                         sensitive_data_keys=keys,
                         browser_config=self.browser.config,
                         context_config=self.browser_context.config,
@@ -340,11 +469,11 @@ class BrowserUseAgent(Agent):
 
             await self.close()
 
-            if self.settings.generate_gif:
+            if settings.generate_gif:
                 output_path: str = "agent_history.gif"
-                if isinstance(self.settings.generate_gif, str):
-                    output_path = self.settings.generate_gif
+                if isinstance(settings.generate_gif, str):
+                    output_path = settings.generate_gif
 
                 create_history_gif(
-                    task=self.task, history=self.state.history, output_path=output_path
+                    task=self.task, history=state.history, output_path=output_path
                 )
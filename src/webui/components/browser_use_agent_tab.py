@@ -877,9 +877,10 @@ async def handle_stop(webui_manager: WebuiManager):
     task = webui_manager.bu_current_task
 
     if agent and task and not task.done():
-        # Signal the agent to stop by setting its internal flag
-        agent.state.stopped = True
-        agent.state.paused = False  # Ensure not paused if stopped
+        # Signal the agent to stop; this also wakes it if it is paused
+        agent.stop()
+        if agent.state.paused:
+            agent.resume()  # Ensure not paused if stopped
         return {
             webui_manager.get_component_by_id(
                 "browser_use_agent.stop_button"